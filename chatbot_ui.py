@@ -1,15 +1,22 @@
 import streamlit as st
 import asyncio
-import whisper
-import tempfile
+import io
+import json
+import uuid
+from collections import deque
+from pathlib import Path
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pysqlite3
 import sys
 from langchain_openai import ChatOpenAI
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 import os
 from interview_practice_system import (
-    initialize_preparation_crew,
-    evaluate_answer,
+    prepare_question,
+    evaluate_answer_async,
     generate_follow_up_question,
 )
 from streamlit_mic_recorder import mic_recorder
@@ -26,18 +33,85 @@ llm = ChatOpenAI(
     openai_api_key=openai_api_key
 )
 
+
+
+# Answers are English speech, so skip language detection and timestamp decoding
+TRANSCRIBE_OPTIONS = dict(
+    beam_size=1, language="en", task="transcribe", without_timestamps=True
+)
+
+
+def _load_whisper_model(name):
+    # Imported here so text-only sessions never pay the ASR import cost
+    import ctranslate2
+    from faster_whisper import WhisperModel
+
+    has_cuda = ctranslate2.get_cuda_device_count() > 0
+    model = WhisperModel(
+        name,
+        device="cuda" if has_cuda else "cpu",
+        compute_type="int8_float16" if has_cuda else "int8",
+    )
+    if has_cuda:
+        # Run one second of silence through the model so CUDA initialization
+        # happens during the background load, not on the first voice answer
+        segments, _ = model.transcribe(
+            np.zeros(16000, dtype=np.float32), **TRANSCRIBE_OPTIONS
+        )
+        list(segments)
+    return model
+
+
+@st.cache_resource
+def preload_whisper_model(name="base"):
+    """Start loading the Whisper model in the background, once per process.
+
+    Returns a future shared across reruns and sessions.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(_load_whisper_model, name)
+    executor.shutdown(wait=False)
+    return future
+
+
+def get_whisper_model(name="base"):
+    """Return the Whisper model, waiting for the background load if needed."""
+    future = preload_whisper_model(name)
+    try:
+        return future.result()
+    except Exception:
+        # Don't keep a failed load cached; retry on the next call
+        preload_whisper_model.clear()
+        raise
+
+
+@st.cache_resource
+def get_background_loop():
+    """Event loop on a daemon thread for work that outlives a single rerun."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
 st.title("🤖 AI Mock Interviewer")
 
+# Only the most recent messages are kept on screen; the full transcript is
+# written to TRANSCRIPT_DIR
+MAX_VISIBLE_MESSAGES = 100
+TRANSCRIPT_DIR = Path("transcripts")
+
 # Initialize session state
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = deque(maxlen=MAX_VISIBLE_MESSAGES)
+    st.session_state.transcript_path = None
     st.session_state.interview_started = False
     st.session_state.current_question = None
     st.session_state.current_answer = None
     st.session_state.evaluation = None
-    st.session_state.preparation_crew = None
+    st.session_state.interview_settings = None
     st.session_state.follow_up_question = None
     st.session_state.is_generating_follow_up = False
+    st.session_state.follow_up_future = None
 
 
 
@@ -50,18 +124,45 @@ with st.sidebar:
 
     if st.button("Start Interview"):
         st.session_state.interview_started = True
-        st.session_state.messages = []
+        st.session_state.messages = deque(maxlen=MAX_VISIBLE_MESSAGES)
+        TRANSCRIPT_DIR.mkdir(exist_ok=True)
+        st.session_state.transcript_path = TRANSCRIPT_DIR / f"{uuid.uuid4().hex}.jsonl"
         st.session_state.current_question = None
         st.session_state.current_answer = None
         st.session_state.evaluation = None
         st.session_state.follow_up_question = None
         st.session_state.is_generating_follow_up = False
+        if st.session_state.follow_up_future is not None:
+            st.session_state.follow_up_future.cancel()
+        st.session_state.follow_up_future = None
+
+        # Remember the settings the interview was started with; the rest of this
+        # run prepares the first question, so no rerun is needed
+        st.session_state.interview_settings = (company_name, role, difficulty)
+
+
+def add_message(role, content):
+    """Add a chat message and append it to the interview transcript."""
+    st.session_state.messages.append({"role": role, "content": content})
+    if st.session_state.transcript_path is not None:
+        with open(st.session_state.transcript_path, "a") as transcript:
+            transcript.write(json.dumps({"role": role, "content": str(content)}) + "\n")
+
+
+def prefetch_follow_up_question():
+    """Start generating the follow-up question while the user answers."""
+    # Use the settings the interview was started with, not the live sidebar
+    company, position, level = st.session_state.interview_settings
+    st.session_state.follow_up_future = asyncio.run_coroutine_threadsafe(
+        generate_follow_up_question(
+            question=st.session_state.current_question,
+            company_name=company,
+            role=position,
+            difficulty=level.lower(),
+        ),
+        get_background_loop(),
+    )
 
-        # Initialize the preparation crew
-        st.session_state.preparation_crew = initialize_preparation_crew(
-            company_name, role, difficulty
-        )
-        st.rerun()
 
 # Display chat messages
 for msg in st.session_state.messages:
@@ -77,18 +178,18 @@ else:
     # If we don't have a current question, start the interview
     if st.session_state.current_question is None:
         with st.spinner("🤖 Preparing your interview question..."):
-            # Execute the preparation crew to get the question and correct answer
-            preparation_result = st.session_state.preparation_crew.kickoff()
+            # Get the question and correct answer, from cache when possible
+            preparation_result = prepare_question(*st.session_state.interview_settings)
 
             # Store the question and correct answer
-            st.session_state.current_question = preparation_result.pydantic.question
-            st.session_state.correct_answer = preparation_result.pydantic.correct_answer
+            st.session_state.current_question = preparation_result.question
+            st.session_state.correct_answer = preparation_result.correct_answer
+            prefetch_follow_up_question()
 
-            # Add the question to the chat
-            st.session_state.messages.append(
-                {"role": "assistant", "content": st.session_state.current_question}
-            )
-            st.rerun()
+            # Add the question to the chat and show it in this run
+            add_message("assistant", st.session_state.current_question)
+        with st.chat_message("assistant"):
+            st.markdown(st.session_state.current_question)
 
 # Get user input
 st.write("Choose your input method:")
@@ -97,93 +198,124 @@ input_method = st.radio("", ["Text", "Voice"], horizontal=True)
 user_input = None  # Initialize user_input
 
 
-def convert_speech_to_text(audio_bytes):
-    try:
-        # Create a temporary file to store the audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-
-        try:
-            # Load the Whisper model (this will download the model on first run)
-            model = whisper.load_model("base")
-
-            # Transcribe the audio
-            result = model.transcribe(temp_audio_path)
-            return result["text"]
-        finally:
-            # Clean up the temporary file
-            os.unlink(temp_audio_path)
+def _transcribe(audio_bytes):
+    """Decode and transcribe recorded audio."""
+    import soundfile as sf
+    from scipy.signal import resample_poly
 
-    except Exception as e:
-        st.error(f"An error occurred: {str(e)}")
-        return None
+    # Decode the recorded WAV in memory instead of round-tripping through disk
+    data, sample_rate = sf.read(
+        io.BytesIO(audio_bytes), dtype="float32", always_2d=False
+    )
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+
+    # Whisper expects 16 kHz mono audio
+    if sample_rate != 16000:
+        data = resample_poly(data, 16000, sample_rate)
+
+    # Reuse the cached Whisper model
+    model = get_whisper_model()
+
+    # Transcribe the audio
+    # Trim silence, including pauses of 300ms or more, before the encoder runs
+    segments, _ = model.transcribe(
+        data.astype(np.float32),
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=300),
+        **TRANSCRIBE_OPTIONS,
+    )
+    return "".join(segment.text for segment in segments).strip()
 
 
 if input_method == "Text":
     user_input = st.chat_input("Type your answer...")
 else:
+    # Load the Whisper model in the background while the user records
+    preload_whisper_model()
+
     st.write("Click the microphone to record your answer:")
     audio = mic_recorder(
         start_prompt="🎤 Start recording",
         stop_prompt="⏹️ Stop recording",
         just_once=True,
         use_container_width=True,
+        format="wav",
     )
 
     if audio:
         with st.spinner("Converting speech to text..."):
             # Convert the audio bytes to text
-            user_input = convert_speech_to_text(audio["bytes"])
+            try:
+                user_input = _transcribe(audio["bytes"])
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+                user_input = None
+
             if user_input:
                 st.success(f"Recognized: {user_input}")
             else:
                 st.error("Could not recognize speech. Please try again.")
 
-if user_input is not None:
+
+# Answers only count once an interview has been started
+if user_input is not None and st.session_state.interview_started:
     # Add user's answer to messages
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    add_message("user", user_input)
 
     # Store the answer
     st.session_state.current_answer = user_input
 
-    # Show thinking message
-    with st.spinner("🤖 Evaluating your answer..."):
-        # Evaluate the answer
-        evaluation = evaluate_answer(
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    # The follow-up is usually prefetched already; otherwise start it now so it
+    # is generated while the evaluation streams
+    if st.session_state.follow_up_future is None:
+        prefetch_follow_up_question()
+    follow_up_future = st.session_state.follow_up_future
+    st.session_state.follow_up_future = None
+
+    # Evaluate the answer on the persistent loop, streaming it as it is written
+    evaluation_chunks = queue.Queue()
+    evaluation_future = asyncio.run_coroutine_threadsafe(
+        evaluate_answer_async(
             question=st.session_state.current_question,
             user_answer=user_input,
             correct_answer=st.session_state.correct_answer,
-        )
+            on_chunk=evaluation_chunks.put,
+        ),
+        get_background_loop(),
+    )
+    # evaluate_answer puts None on the queue once the evaluation ends; this is a
+    # fallback in case it fails before getting that far
+    evaluation_future.add_done_callback(lambda _: evaluation_chunks.put(None))
+    with st.chat_message("assistant"):
+        with st.spinner("🤖 Evaluating your answer..."):
+            st.write_stream(iter(evaluation_chunks.get, None))
+    evaluation = evaluation_future.result()
 
+    # Show thinking message
+    with st.spinner("🤖 Preparing the follow-up question..."):
         # Add the evaluation to the chat
-        st.session_state.messages.append({"role": "assistant", "content": evaluation})
+        add_message("assistant", evaluation)
 
-        # Generate follow-up question if not already generating
+        # Use the follow-up question if one was generated
         if not st.session_state.is_generating_follow_up:
             st.session_state.is_generating_follow_up = True
             try:
-                # Generate follow-up question
-                follow_up_result = asyncio.run(
-                    generate_follow_up_question(
-                        question=st.session_state.current_question,
-                        company_name=company_name,
-                        role=role,
-                        difficulty=difficulty.lower(),
-                    )
-                )
+                follow_up_result = follow_up_future.result()
 
                 # Store the follow-up question
                 st.session_state.follow_up_question = follow_up_result
 
                 # Add the follow-up question to the chat
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": follow_up_result.question}
-                )
+                add_message("assistant", follow_up_result.question)
 
                 # Set up for the follow-up question
                 st.session_state.current_question = follow_up_result.question
                 st.session_state.correct_answer = follow_up_result.correct_answer
+                prefetch_follow_up_question()
             except Exception as e:
                 st.error(f"Error generating follow-up question: {str(e)}")
                 st.session_state.current_question = None
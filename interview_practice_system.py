@@ -1,7 +1,19 @@
-from crewai import Agent, Task, Crew, Process
+from crewai import Agent, Task, Crew, Process, LLM
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
 from crewai_tools import SerperDevTool
 from pydantic import BaseModel, Field
 import asyncio
+import logging
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import question_cache
+
+logger = logging.getLogger(__name__)
+
+# Set CREW_VERBOSE=1 to print the agents' intermediate reasoning
+VERBOSE = bool(int(os.environ.get("CREW_VERBOSE", "0")))
 
 
 class QuestionAnswerPair(BaseModel):
@@ -11,8 +23,50 @@ class QuestionAnswerPair(BaseModel):
     correct_answer: str = Field(..., description="The correct answer to the question")
 
 
+# Shared by every search so repeated queries reuse the keep-alive connection
+_serper_session = requests.Session()
+_serper_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+
+
+class PooledSerperDevTool(SerperDevTool):
+    """SerperDevTool that sends its searches through a pooled HTTP session."""
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        payload = {"q": search_query, "num": self.n_results}
+        if self.country:
+            payload["gl"] = self.country
+        if self.location:
+            payload["location"] = self.location
+        if self.locale:
+            payload["hl"] = self.locale
+
+        response = None
+        try:
+            response = _serper_session.post(
+                self._get_search_url(search_type),
+                json=payload,
+                headers={
+                    "X-API-KEY": os.environ.get("SERPER_API_KEY")
+                    or os.environ["SERPER_KEY"],
+                    "content-type": "application/json",
+                },
+                timeout=10,
+            )
+            response.raise_for_status()
+            results = response.json()
+            if not results:
+                raise ValueError("Empty response from Serper API")
+            return results
+        except (requests.exceptions.RequestException, ValueError) as e:
+            error_msg = f"Error making request to Serper API: {e}"
+            if response is not None:
+                error_msg += f"\nResponse content: {response.content}"
+            logger.error(error_msg)
+            raise
+
+
 # Initialize the search tool
-search_tool = SerperDevTool()
+search_tool = PooledSerperDevTool()
 
 # First Crew: Question Preparation
 # Create the company research agent
@@ -23,7 +77,7 @@ company_researcher = Agent(
     You have deep knowledge of tech industry hiring practices and can create relevant
     questions that test both theoretical knowledge and practical skills.""",
     tools=[search_tool],
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 # Create the question preparer agent
@@ -34,18 +88,27 @@ question_preparer = Agent(
     challenging yet fair technical questions and provide detailed model answers.
     You understand how to assess different skill levels and create questions that
     test both theoretical knowledge and practical problem-solving abilities.""",
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 # Second Crew: Answer Evaluation
 # Create the answer evaluator agent
-answer_evaluator = Agent(
-    role="Answer Evaluator",
-    goal="Evaluate if the given answer is correct for the question",
-    backstory="""You are a senior technical interviewer who evaluates answers
-    against the expected solution. You know how to identify if an answer is
-    technically correct and complete.""",
-    verbose=True,
+def create_answer_evaluator(llm: LLM = None) -> Agent:
+    return Agent(
+        role="Answer Evaluator",
+        goal="Evaluate if the given answer is correct for the question",
+        backstory="""You are a senior technical interviewer who evaluates answers
+        against the expected solution. You know how to identify if an answer is
+        technically correct and complete.""",
+        llm=llm,
+        verbose=VERBOSE,
+    )
+
+
+answer_evaluator = create_answer_evaluator()
+# Shared by every streamed evaluation in the UI
+streaming_answer_evaluator = create_answer_evaluator(
+    LLM(model=os.environ.get("OPENAI_MODEL_NAME", "gpt-4o-mini"), stream=True)
 )
 
 # Create the follow-up question agent
@@ -56,7 +119,7 @@ follow_up_questioner = Agent(
     meaningful follow-up questions that probe deeper into a candidate's knowledge
     and understanding. You can create questions that build upon previous answers
     and test different aspects of the candidate's technical expertise.""",
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 
@@ -90,7 +153,10 @@ def create_question_preparation_task(difficulty: str) -> Task:
 
 # Create task for the second crew
 def create_evaluation_task(
-    question: str, user_answer: str, correct_answer: str
+    question: str,
+    user_answer: str,
+    correct_answer: str,
+    agent: Agent = answer_evaluator,
 ) -> Task:
     return Task(
         description=f"""Evaluate if the given answer is correct for the question:
@@ -102,7 +168,7 @@ def create_evaluation_task(
         2. Key points that were correct or missing
         3. A brief explanation of why the answer is correct or incorrect""",
         expected_output="Evaluation of whether the answer is correct for the question with feedback",
-        agent=answer_evaluator,
+        agent=agent,
     )
 
 
@@ -140,18 +206,32 @@ def create_follow_up_crew(
             create_follow_up_question_task(question, company_name, role, difficulty),
         ],
         process=Process.sequential,
-        verbose=True,
+        verbose=VERBOSE,
     )
     return crew
 
 
+def _store_in_background(*args) -> None:
+    """Cache a result without making the caller wait for the embedding model."""
+    threading.Thread(target=question_cache.store, args=args, daemon=True).start()
+
+
 async def generate_follow_up_question(
     question: str, company_name: str, role: str, difficulty: str
 ) -> QuestionAnswerPair:
     """Generate a follow-up question asynchronously."""
+    # Only the original question is matched semantically
+    partition = (company_name, role, difficulty)
+    cached = await asyncio.to_thread(
+        question_cache.lookup, "follow_up", partition, question
+    )
+    if cached is not None:
+        return QuestionAnswerPair(**cached)
+
     result = await create_follow_up_crew(
         question, company_name, role, difficulty
     ).kickoff_async()
+    _store_in_background("follow_up", partition, question, result.pydantic.model_dump())
     return result.pydantic
 
 
@@ -159,25 +239,14 @@ async def generate_follow_up_question(
 async def start_interview_practice(
     company_name: str, role: str, difficulty: str = "easy"
 ):
-    # First Crew: Prepare the question and answer
-    preparation_crew = Crew(
-        agents=[company_researcher, question_preparer],
-        tasks=[
-            create_company_research_task(company_name, role, difficulty),
-            create_question_preparation_task(difficulty),
-        ],
-        process=Process.sequential,
-        verbose=True,
-    )
-
-    # Execute the first crew to get the question and model answer
-    preparation_result = preparation_crew.kickoff()
+    # First Crew: Prepare the question and answer, reusing a cached result
+    preparation_result = prepare_question(company_name, role, difficulty)
 
     # Generate follow-up question right after preparation (async)
 
     follow_up_question_task = asyncio.create_task(
         generate_follow_up_question(
-            question=preparation_result.pydantic.question,
+            question=preparation_result.question,
             company_name=company_name,
             role=role,
             difficulty=difficulty,
@@ -186,7 +255,7 @@ async def start_interview_practice(
 
     # Print the main question and get user's answer
     print("\nQuestion:")
-    print(preparation_result.pydantic.question)
+    print(preparation_result.question)
     user_answer = input("\nYour answer: ")
 
     # Second Crew: Evaluate the answer
@@ -194,17 +263,17 @@ async def start_interview_practice(
         agents=[answer_evaluator],
         tasks=[
             create_evaluation_task(
-                question=preparation_result.pydantic.question,
+                question=preparation_result.question,
                 user_answer=user_answer,
-                correct_answer=preparation_result.pydantic.correct_answer,
+                correct_answer=preparation_result.correct_answer,
             )
         ],
         process=Process.sequential,
-        verbose=True,
+        verbose=VERBOSE,
     )
 
-    # Execute the second crew and get evaluation
-    evaluation_result = evaluation_crew.kickoff()
+    # Execute the second crew without blocking the pending follow-up task
+    evaluation_result = await evaluation_crew.kickoff_async()
     print("\nEvaluation:")
     print(evaluation_result)
 
@@ -229,7 +298,7 @@ async def start_interview_practice(
             )
         ],
         process=Process.sequential,
-        verbose=True,
+        verbose=VERBOSE,
     )
 
     # Execute the follow-up evaluation
@@ -238,13 +307,6 @@ async def start_interview_practice(
     print(follow_up_evaluation)
 
 
-if __name__ == "__main__":
-    company = "Google"
-    role = "Data Scientist"
-    print(f"Starting mock interview practice for {role} position at {company}...")
-    asyncio.run(start_interview_practice(company, role))
-
-
 # ------------------------------------------------------------------------------------------------
 # For the Streamlit app
 # ------------------------------------------------------------------------------------------------
@@ -257,22 +319,136 @@ def initialize_preparation_crew(company_name: str, role: str, difficulty: str) -
             create_question_preparation_task(difficulty),
         ],
         process=Process.sequential,
-        verbose=True,
+        verbose=VERBOSE,
     )
 
 
-def evaluate_answer(question: str, user_answer: str, correct_answer: str) -> str:
-    """Create and execute the evaluation crew to assess the user's answer."""
-    evaluation_crew = Crew(
-        agents=[answer_evaluator],
+def prepare_question(
+    company_name: str, role: str, difficulty: str
+) -> QuestionAnswerPair:
+    """Return a cached question, running the preparation crew on a miss."""
+    # Company and difficulty must match exactly; similar role titles can share
+    partition = (company_name, difficulty)
+    cached = question_cache.lookup("preparation", partition, role)
+    if cached is not None:
+        return QuestionAnswerPair(**cached)
+
+    result = initialize_preparation_crew(company_name, role, difficulty).kickoff()
+    _store_in_background("preparation", partition, role, result.pydantic.model_dump())
+    return result.pydantic
+
+
+def create_evaluation_crew(
+    question: str,
+    user_answer: str,
+    correct_answer: str,
+    evaluator: Agent = answer_evaluator,
+) -> Crew:
+    """Initialize the crew responsible for evaluating the user's answer."""
+    return Crew(
+        agents=[evaluator],
         tasks=[
             create_evaluation_task(
                 question=question,
                 user_answer=user_answer,
                 correct_answer=correct_answer,
+                agent=evaluator,
             )
         ],
         process=Process.sequential,
-        verbose=True,
+        verbose=VERBOSE,
+    )
+
+
+# Chunk callbacks of in-flight streamed evaluations, keyed by the thread running
+# the kickoff; crewai calls event handlers synchronously on that thread
+_stream_callbacks = {}
+
+
+if not VERBOSE:
+    # crewai's default listener prints every streamed token to stdout (and keeps
+    # it in memory) regardless of verbose, so drop it unless debugging
+    _stream_handlers = crewai_event_bus._handlers.get(LLMStreamChunkEvent, [])
+    _stream_handlers[:] = [
+        handler
+        for handler in _stream_handlers
+        if handler.__name__ != "on_llm_stream_chunk"
+    ]
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _forward_evaluation_chunk(source, event):
+    callback = _stream_callbacks.get(threading.get_ident())
+    if callback is not None:
+        callback(event.chunk)
+
+
+def _final_answer_only(on_chunk):
+    """Wrap ``on_chunk`` to pass on only the text after "Final Answer:".
+
+    Calling the wrapper with ``None`` ends the stream: if the marker never
+    appeared, the buffered output is passed on as is, followed by ``None``.
+    """
+    marker = "Final Answer:"
+    buffer = ""
+    started = False
+
+    def forward(chunk):
+        nonlocal buffer, started
+        if chunk is None:
+            if not started and buffer:
+                on_chunk(buffer)
+            on_chunk(None)
+        elif started:
+            on_chunk(chunk)
+        else:
+            buffer += chunk
+            if marker in buffer:
+                started = True
+                answer = buffer.split(marker, 1)[1].lstrip()
+                if answer:
+                    on_chunk(answer)
+
+    return forward
+
+
+def evaluate_answer(
+    question: str, user_answer: str, correct_answer: str, on_chunk=None
+) -> str:
+    """Create and execute the evaluation crew to assess the user's answer.
+
+    If given, ``on_chunk`` is called with each piece of the evaluation as it
+    streams, and with ``None`` once the evaluation has finished.
+    """
+    if on_chunk is None:
+        return create_evaluation_crew(question, user_answer, correct_answer).kickoff()
+
+    thread_id = threading.get_ident()
+    forward = _final_answer_only(on_chunk)
+    try:
+        _stream_callbacks[thread_id] = forward
+        return create_evaluation_crew(
+            question,
+            user_answer,
+            correct_answer,
+            evaluator=streaming_answer_evaluator,
+        ).kickoff()
+    finally:
+        _stream_callbacks.pop(thread_id, None)
+        forward(None)
+
+
+async def evaluate_answer_async(
+    question: str, user_answer: str, correct_answer: str, on_chunk=None
+) -> str:
+    """Evaluate the user's answer asynchronously."""
+    return await asyncio.to_thread(
+        evaluate_answer, question, user_answer, correct_answer, on_chunk
     )
-    return evaluation_crew.kickoff()
+
+
+if __name__ == "__main__":
+    company = "Google"
+    role = "Data Scientist"
+    print(f"Starting mock interview practice for {role} position at {company}...")
+    asyncio.run(start_interview_practice(company, role))
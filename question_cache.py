@@ -0,0 +1,81 @@
+import functools
+
+import diskcache
+import numpy as np
+
+CACHE_DIR = ".qa_cache"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.92
+CACHE_TTL = 24 * 60 * 60  # seconds
+
+_cache = diskcache.Cache(CACHE_DIR)
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedder():
+    """Return the process-wide sentence embedding model, loading it on first use.
+
+    Anything else that needs embeddings should use this instance rather than
+    loading its own copy of the model.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def _embed(text: str) -> np.ndarray:
+    return get_embedder().encode(text, normalize_embeddings=True)
+
+
+def _normalize(text: str) -> str:
+    return text.strip().lower()
+
+
+def _partition_key(namespace: str, partition: tuple) -> str:
+    return f"{namespace}:" + "|".join(_normalize(part) for part in partition)
+
+
+def lookup(namespace: str, partition: tuple, text: str):
+    """Return the cached value for ``text`` within an exactly matched partition.
+
+    ``partition`` holds the fields that must match exactly (e.g. difficulty);
+    only ``text`` falls back to embedding similarity.
+    """
+    prefix = _partition_key(namespace, partition)
+    text = _normalize(text)
+    value = _cache.get(f"{prefix}:{text}")
+    if value is not None:
+        return value
+
+    # Skip texts whose cached values have already expired
+    index = [
+        (stored_text, embedding)
+        for stored_text, embedding in _cache.get(f"{prefix}:__index__", [])
+        if f"{prefix}:{stored_text}" in _cache
+    ]
+    if not index:
+        return None
+
+    stored_texts, embeddings = zip(*index)
+    scores = np.stack(embeddings) @ _embed(text)
+    best = int(np.argmax(scores))
+    if scores[best] < SIMILARITY_THRESHOLD:
+        return None
+    return _cache.get(f"{prefix}:{stored_texts[best]}")
+
+
+def store(namespace: str, partition: tuple, text: str, value) -> None:
+    """Cache a value and index its text for semantic lookups in its partition."""
+    prefix = _partition_key(namespace, partition)
+    text = _normalize(text)
+    embedding = _embed(text)
+    with _cache.transact():
+        _cache.set(f"{prefix}:{text}", value, expire=CACHE_TTL)
+        # Drop expired texts (and any older entry for this one) from the index
+        index = [
+            (stored_text, stored_embedding)
+            for stored_text, stored_embedding in _cache.get(f"{prefix}:__index__", [])
+            if stored_text != text and f"{prefix}:{stored_text}" in _cache
+        ]
+        index.append((text, embedding))
+        _cache.set(f"{prefix}:__index__", index)
@@ -0,0 +1,24 @@
+from interview_practice_system import _final_answer_only
+
+
+def stream(chunks):
+    received = []
+    forward = _final_answer_only(received.append)
+    for chunk in chunks:
+        forward(chunk)
+    forward(None)
+    return received
+
+
+def test_final_answer_marker_split_across_chunks():
+    received = stream(
+        ["Thought: I now know.\nFinal Ans", "wer: The answer", " is correct."]
+    )
+
+    assert received == ["The answer", " is correct.", None]
+
+
+def test_output_without_marker_is_passed_on_at_the_end():
+    received = stream(["The answer ", "is correct."])
+
+    assert received == ["The answer is correct.", None]
@@ -0,0 +1,49 @@
+import diskcache
+import numpy as np
+import pytest
+
+import question_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(question_cache, "_cache", diskcache.Cache(str(tmp_path)))
+    # Every text embeds identically, the worst case for semantic collisions
+    monkeypatch.setattr(
+        question_cache, "_embed", lambda text: np.array([1.0, 0.0], dtype=np.float32)
+    )
+
+
+def test_difficulty_is_matched_exactly():
+    question_cache.store(
+        "preparation", ("Google", "Medium"), "Software Engineer", {"question": "q"}
+    )
+
+    assert (
+        question_cache.lookup("preparation", ("Google", "Hard"), "Software Engineer")
+        is None
+    )
+
+
+def test_similar_text_hits_within_partition():
+    question_cache.store(
+        "preparation", ("Google", "Medium"), "Software Engineer", {"question": "q"}
+    )
+
+    assert question_cache.lookup(
+        "preparation", ("google", "medium"), "Software Developer"
+    ) == {"question": "q"}
+
+
+def test_store_prunes_expired_texts_from_index():
+    question_cache.store(
+        "preparation", ("Google", "Medium"), "Software Engineer", {"question": "q"}
+    )
+    question_cache._cache.delete("preparation:google|medium:software engineer")
+
+    question_cache.store(
+        "preparation", ("Google", "Medium"), "Data Scientist", {"question": "q2"}
+    )
+
+    index = question_cache._cache.get("preparation:google|medium:__index__")
+    assert [text for text, _ in index] == ["data scientist"]